@@ -1,155 +1,231 @@
 """
-Cloud Threat Detection System - Main Flask Application
+Cloud Threat Detection System - Main Quart (ASGI) Application
 Real-time threat detection using dual ML models
 """
 
-from flask import Flask, request, jsonify, send_from_directory
-import joblib
-import pickle
+from quart import Quart, Blueprint, request, jsonify, send_from_directory
+import asyncio
+import logging
 import os
 import sys
+import time
+
+import numpy as np
+import orjson
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(__file__))
 
 from utils.feature_extractor import extract_features, extract_simple_features
-from utils.logger import log_activity, log_threat, log_mitigation, get_recent_logs
-from mitigation.actions import mitigate, is_blocked, get_mitigation_stats
+from utils.logger import log_activity, log_threat, log_mitigation, get_recent_logs, get_device_logs
+from mitigation.actions import mitigate, blocked_ips, get_mitigation_stats
 from utils.user_manager import (
-    add_device, get_all_devices, get_device, update_device, 
-    delete_device, update_device_status, get_statistics, get_device_credentials
+    add_device, get_public_devices, public_dict, get_device, update_device, 
+    delete_device, update_device_status, get_statistics, get_device_credentials,
+    METRIC_DELTAS, take_metric_deltas, apply_metric_deltas
 )
 from utils.payload_sender import trigger_real_payload
-
-app = Flask(__name__)
-
-# Load ML Models
-print("🔄 Loading AI models...")
-try:
-    # UNSW-NB15 Anomaly Detection Model
-    with open("models/unsw_nb15_model.pkl", "rb") as f:
-        anomaly_model = pickle.load(f)
-    print("✅ UNSW-NB15 Anomaly Model loaded")
+from utils.json_provider import OrjsonProvider
+from detection import PayloadView, DETECTION_BASE, classify_payload, cache_stats
+
+app = Quart(__name__, static_folder=None)
+app.json = OrjsonProvider(app)
+
+log = logging.getLogger("detector")
+
+
+def _prebuilt_response(obj, status=200):
+    """Serialize a fixed response body once so handlers can return the same object"""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
+# Fixed responses, built once at import and returned as-is
+_BLOCKED_RESP = _prebuilt_response({
+    "status": "BLOCKED",
+    "message": "IP is blocked due to previous violations"
+}, status=403)
+
+_NOT_FOUND_RESP = _prebuilt_response({
+    "success": False,
+    "error": "Device not found"
+}, status=404)
+
+_NORMAL_RESP = _prebuilt_response({
+    "status": "NORMAL",
+    "message": "Traffic appears normal"
+})
+
+# Templates merged into per-request detection responses
+_THREAT_BASE = {"status": "THREAT", **DETECTION_BASE}
+_NORMAL_DETECTION = {"attack_type": "Normal", "confidence": 0.95}
+
+# The heuristic detector never loads the ML models; health reports whether
+# the model files are deployed alongside the app
+MODEL_FILES = ("models/unsw_nb15_model.pkl", "models/rf_model.joblib")
+
+_HEALTH_RESP = _prebuilt_response({
+    "status": "online",
+    "models_loaded": all(os.path.exists(os.path.join(app.root_path, f)) for f in MODEL_FILES),
+    "version": "1.0.0"
+})
+
+# Shared RNG for generating simulated attack payloads
+_RNG = np.random.default_rng()
+
+# Simulated payload ranges per attack type (randint-style inclusive bounds):
+# (rate_lo, rate_hi, sbytes_lo, sbytes_hi, spkts_lo, spkts_hi,
+#  dur_lo, dur_hi, ct_dst_ltm_lo, ct_dst_ltm_hi, state, dpkts)
+TEMPLATES = {
+    # DoS attack: High rate and large bytes
+    "dos": (250, 500, 60000, 100000, 300, 600, 0.1, 2.0, 10, 50, "CON", 10),
+    # Exploit: Large packet sizes
+    "exploit": (20, 100, 75000, 150000, 50, 150, 1.0, 10.0, 5, 20, "CON", 10),
+    # Port scan: High connection attempts
+    "reconnaissance": (50, 150, 100, 1000, 20, 80, 0.01, 0.5, 150, 300, "REQ", 0),
+    # Backdoor: Long duration, large bidirectional traffic
+    "backdoor": (10, 50, 120000, 200000, 100, 200, 150, 500, 1, 5, "CON", 10),
+    # Normal traffic
+    "normal": (1, 50, 100, 10000, 5, 50, 0.1, 5.0, 1, 10, "CON", 10)
+}
+
+# Real payload sends still in flight (referenced here so they aren't garbage collected)
+_payload_tasks = set()
+
+
+def _report_real_payload(task):
+    """Log the outcome of a background real payload transmission"""
+    _payload_tasks.discard(task)
     
-    # Random Forest Attack Classifier
-    rf_model = joblib.load("models/rf_model.joblib")
-    print("✅ RF Attack Classifier loaded")
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        log.error("sending real payload failed", exc_info=task.exception())
+        return
     
-    models_loaded = True
-except Exception as e:
-    print(f"❌ Error loading models: {e}")
-    models_loaded = False
-
-
-@app.route("/")
-def home():
-    """Main enterprise dashboard"""
-    return send_from_directory(".", "1code.html")
+    real_payload_result = task.result()
+    if real_payload_result.get("success"):
+        log.info("real payload sent to %s: %s",
+                 real_payload_result["target_ip"], real_payload_result["details"])
+    else:
+        log.warning("real payload to %s had issues; device may be offline or unreachable",
+                    real_payload_result["target_ip"])
+
+
+# Device metric increments are buffered and written out on this interval (seconds)
+METRICS_FLUSH_INTERVAL = 0.25
+
+
+async def _flush_metrics():
+    """Write buffered device metric increments, one file write per interval"""
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        # Runs on the event loop like every other users.json read-modify-write,
+        # so it can never interleave with a device add/update/delete
+        try:
+            apply_metric_deltas(take_metric_deltas())
+        except Exception:
+            # Keep the writer alive; later increments still need writing
+            log.exception("writing device metrics failed")
+
+
+@app.before_serving
+async def start_metrics_writer():
+    """Start the background device metrics writer"""
+    app.metrics_writer = asyncio.create_task(_flush_metrics())
+
+
+@app.after_serving
+async def stop_metrics_writer():
+    """Stop the metrics writer and write out anything still buffered"""
+    app.metrics_writer.cancel()
+    try:
+        apply_metric_deltas(take_metric_deltas())
+    except Exception:
+        log.exception("writing device metrics failed")
 
-@app.route("/analysis")
-def analysis():
-    """Threat analysis page"""
-    return send_from_directory(".", "code.html")
 
-@app.route("/demo")
-def demo():
-    """Original demo dashboard"""
-    return send_from_directory("frontend", "client1.html")
+def _handle_threat(payload, attack_name, attack_label, device=None):
+    """
+    Log a detected threat, apply mitigation and update device metrics
+    
+    Args:
+        payload (dict): Request payload (with src_ip set)
+        attack_name (str): Detected attack type
+        attack_label (int): Detected attack class
+        device (dict, optional): Registered device the payload targeted
+        
+    Returns:
+        dict: Mitigation result
+    """
+    src_ip = payload["src_ip"]
+    
+    # Log threat
+    log_threat(payload, attack_name, -1.0)
+    
+    # Execute mitigation
+    mitigation_result = mitigate(src_ip, attack_label)
+    log_mitigation(src_ip, attack_name, mitigation_result["action"])
+    
+    # Update device metrics
+    if device is not None:
+        device_deltas = METRIC_DELTAS[device["device_id"]]
+        device_deltas["threats_detected"] += 1
+        device_deltas["mitigations_applied"] += 1
+        device_deltas["total_requests"] += 1
+    
+    return mitigation_result
 
 
 @app.route("/api/health", methods=["GET"])
-def health_check():
+async def health_check():
     """Health check endpoint"""
-    return jsonify({
-        "status": "online",
-        "models_loaded": models_loaded,
-        "version": "1.0.0"
-    })
+    return _HEALTH_RESP
 
 
 @app.route("/api/request", methods=["POST"])
-def handle_request():
+async def handle_request():
+    """
+    Main detection endpoint
+    Analyzes incoming traffic and applies mitigation if needed
+    """
+    payload = await request.get_json()
+    if not payload:
+        return jsonify({"error": "No payload provided"}), 400
+    
+    src_ip = payload.get("src_ip", request.remote_addr)
     payload["src_ip"] = src_ip
     
     # Check if IP is already blocked
-    if is_blocked(src_ip):
-        return jsonify({
-            "status": "BLOCKED",
-            "message": "IP is blocked due to previous violations"
-        }), 403
+    if src_ip in blocked_ips:
+        return _BLOCKED_RESP
     
     try:
         # Simple rule-based detection (works reliably)
-        rate = payload.get("rate", 0)
-        sbytes = payload.get("sbytes", 0)
-        protocol = payload.get("protocol", "tcp").lower()
-        state = payload.get("state", "").upper()
-        ct_dst_ltm = payload.get("ct_dst_ltm", 0)
-        
-        # Determine if this is an attack based on heuristics
-        is_attack = False
-        attack_name = "Normal"
-        attack_label = 0
-        confidence = 0.5
-        
-        #  DoS Detection
-        if rate > 200 or (sbytes > 50000 and rate > 50):
-            is_attack = True
-            attack_name = "DoS"
-            attack_label = 1
-            confidence = min(0.95, 0.70 + (rate / 1000))
-            
-        # Exploit Detection
-        elif sbytes > 70000 or (protocol == "tcp" and sbytes > 50000):
-            is_attack = True
-            attack_name = "Exploits"
-            attack_label = 2
-            confidence = min(0.95, 0.75 + (sbytes / 100000))
-            
-        # Reconnaissance/Port Scan
-        elif ct_dst_ltm > 100 or (state == "REQ" and payload.get("dpkts", 0) == 0):
-            is_attack = True
-            attack_name = "Reconnaissance"
-            attack_label = 4
-            confidence = min(0.92, 0.80 + (ct_dst_ltm / 500))
-            
-        # Backdoor Detection (long duration, bi-directional traffic)
-        elif payload.get("dur", 0) > 100 and sbytes > 100000:
-            is_attack = True
-            attack_name = "Backdoor"
-            attack_label = 6
-            confidence = 0.88
+        is_attack, attack_name, attack_label, confidence = classify_payload(PayloadView.from_json(payload))
         
         if is_attack:
-            # Log threat
-            log_threat(payload, attack_name, -1.0)
-            
-            # Execute mitigation
-            mitigation_result = mitigate(src_ip, attack_label)
-            log_mitigation(src_ip, attack_name, mitigation_result["action"])
+            mitigation_result = _handle_threat(payload, attack_name, attack_label)
             
             return jsonify({
-                "status": "THREAT",
+                **_THREAT_BASE,
                 "attack_type": attack_name,
                 "attack_label": attack_label,
                 "confidence": confidence,
-                "anomaly_score": -1.0,
-                "mitigation": mitigation_result,
-                "detection_method": "ai_heuristic"
+                "mitigation": mitigation_result
             })
         else:
             # Normal traffic
             log_activity(payload)
-            return jsonify({
-                "status": "NORMAL",
-                "message": "Traffic appears normal"
-            })
+            return _NORMAL_RESP
         
     except Exception as e:
-        print(f"❌ Error processing request: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("processing request failed")
         return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/logs/<log_type>", methods=["GET"])
+async def get_logs(log_type):
+    """Get recent logs of specified type"""
     try:
         lines = int(request.args.get("lines", 20))
         logs = get_recent_logs(log_type, lines)
@@ -163,7 +239,7 @@ def handle_request():
 
 
 @app.route("/api/stats", methods=["GET"])
-def get_stats():
+async def get_stats():
     """Get mitigation statistics"""
     try:
         stats = get_mitigation_stats()
@@ -172,57 +248,111 @@ def get_stats():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/frontend/<path:filename>")
-def serve_frontend(filename):
+@app.route("/api/cache/stats", methods=["GET"])
+async def get_cache_stats():
+    """Get classification cache statistics"""
+    try:
+        return jsonify(cache_stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ============================================
+# DASHBOARD PAGES (fallback when not behind nginx)
+# ============================================
+
+# nginx.conf serves the dashboard from disk; python app.py and deployments
+# without nginx (set SERVE_STATIC=1) serve the same files from here instead
+SERVE_STATIC = __name__ == "__main__" or os.environ.get("SERVE_STATIC") == "1"
+
+pages = Blueprint("pages", __name__)
+
+
+@pages.route("/")
+async def home():
+    """Main enterprise dashboard"""
+    return await send_from_directory(app.root_path, "1code.html")
+
+
+@pages.route("/analysis")
+async def analysis():
+    """Threat analysis page"""
+    return await send_from_directory(app.root_path, "code.html")
+
+
+@pages.route("/demo")
+async def demo():
+    """Original demo dashboard"""
+    return await send_from_directory(os.path.join(app.root_path, "frontend"), "client1.html")
+
+
+@pages.route("/static/<path:filename>")
+async def serve_static_files(filename):
+    """Serve static CSS and JS files"""
+    return await send_from_directory(os.path.join(app.root_path, "static"), filename)
+
+
+@pages.route("/frontend/<path:filename>")
+async def serve_frontend(filename):
     """Serve frontend files"""
-    return send_from_directory("frontend", filename)
+    return await send_from_directory(os.path.join(app.root_path, "frontend"), filename)
+
+
+@pages.route("/<page>.html")
+async def serve_page(page):
+    """Serve a top-level dashboard page"""
+    return await send_from_directory(app.root_path, f"{page}.html")
+
 
-# Serve all HTML pages explicitly
-@app.route("/alerts.html")
-def alerts_page():
-    """Alerts page"""
-    return send_from_directory(".", "alerts.html")
+@pages.route("/<script>.js")
+async def serve_script(script):
+    """Serve a top-level dashboard script"""
+    return await send_from_directory(app.root_path, f"{script}.js")
 
-@app.route("/users.html")
-def users_page():
-    """Users/Devices Management page"""
-    return send_from_directory(".", "users.html")
 
-@app.route("/instance-detail.html")
-def instance_detail_page():
-    """Instance Detail Monitoring page"""
-    return send_from_directory(".", "instance-detail.html")
+if SERVE_STATIC:
+    app.register_blueprint(pages)
 
 
 # ============================================
 # USER/DEVICE MANAGEMENT API ENDPOINTS
 # ============================================
 
+# Serialized /api/users listing as (monotonic time, JSON bytes)
+USERS_CACHE_TTL = 1.0
+_users_cache = None
+
+
+def _invalidate_users_cache():
+    """Drop the cached device listing after a device is added, changed or removed"""
+    global _users_cache
+    _users_cache = None
+
+
 @app.route("/api/users", methods=["GET"])
-def list_devices():
+async def list_devices():
     """Get all registered devices"""
+    global _users_cache
     try:
-        devices = get_all_devices()
-        # Don't send passwords in the response
-        safe_devices = []
-        for device in devices:
-            safe_device = {k: v for k, v in device.items() if k != "password"}
-            safe_devices.append(safe_device)
+        now = time.monotonic()
+        if _users_cache is None or now - _users_cache[0] > USERS_CACHE_TTL:
+            devices = get_public_devices()
+            _users_cache = (now, orjson.dumps({
+                "success": True,
+                "devices": devices,
+                "count": len(devices)
+            }))
         
-        return jsonify({
-            "success": True,
-            "devices": safe_devices,
-            "count": len(safe_devices)
-        })
+        return app.response_class(_users_cache[1], mimetype="application/json")
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/users", methods=["POST"])
-def register_device():
+async def register_device():
     """Register a new Termux device"""
     try:
-        data = request.json
+        data = await request.get_json()
         
         # Validate required fields
         required = ["device_name", "ip_address", "username", "password"]
@@ -241,13 +371,12 @@ def register_device():
             port=data.get("port", 8022)
         )
         
-        # Remove password from response
-        safe_device = {k: v for k, v in device.items() if k != "password"}
+        _invalidate_users_cache()
         
         return jsonify({
             "success": True,
             "message": "Device registered successfully",
-            "device": safe_device
+            "device": public_dict(device)
         }), 201
         
     except Exception as e:
@@ -255,68 +384,71 @@ def register_device():
 
 
 @app.route("/api/users/<device_id>", methods=["GET"])
-def get_device_info(device_id):
+async def get_device_info(device_id):
     """Get specific device information"""
     try:
         device = get_device(device_id)
         if not device:
-            return jsonify({
-                "success": False,
-                "error": "Device not found"
-            }), 404
-        
-        # Remove password from response
-        safe_device = {k: v for k, v in device.items() if k != "password"}
+            return _NOT_FOUND_RESP
         
         return jsonify({
             "success": True,
-            "device": safe_device
+            "device": public_dict(device)
         })
     except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
 
+
+@app.route("/api/users/<device_id>", methods=["PUT"])
+async def modify_device(device_id):
+    """Update device information"""
+    try:
+        data = await request.get_json()
+        device = update_device(device_id, data)
+        
+        if not device:
+            return _NOT_FOUND_RESP
         
-        # Remove password from response
-        safe_device = {k: v for k, v in device.items() if k != "password"}
+        _invalidate_users_cache()
         
         return jsonify({
             "success": True,
             "message": "Device updated successfully",
-            "device": safe_device
+            "device": public_dict(device)
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/users/<device_id>", methods=["DELETE"])
-def remove_device(device_id):
+async def remove_device(device_id):
     """Delete a device"""
     try:
         success = delete_device(device_id)
         
         if success:
+            _invalidate_users_cache()
             return jsonify({
                 "success": True,
                 "message": "Device deleted successfully"
             })
         else:
-            return jsonify({
-                "success": False,
-                "error": "Device not found"
-            }), 404
+            return _NOT_FOUND_RESP
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/users/<device_id>/status", methods=["POST"])
-def update_status(device_id):
+async def update_status(device_id):
     """Update device status and metrics"""
     try:
-        data = request.json
+        data = await request.get_json()
         status = data.get("status", "online")
         metrics = data.get("metrics", None)
         
         update_device_status(device_id, status, metrics)
+        _invalidate_users_cache()
         
         return jsonify({
             "success": True,
@@ -327,7 +459,7 @@ def update_status(device_id):
 
 
 @app.route("/api/users/stats", methods=["GET"])
-def device_statistics():
+async def device_statistics():
     """Get device statistics"""
     try:
         stats = get_statistics()
@@ -340,8 +472,18 @@ def device_statistics():
 
 
 @app.route("/api/users/<device_id>/trigger-payload", methods=["POST"])
-def trigger_payload(device_id):
-        data = request.json
+async def trigger_payload(device_id):
+    """Trigger a test attack payload against a registered device"""
+    try:
+        device = get_device(device_id)
+        if not device:
+            return _NOT_FOUND_RESP
+        
+        # Check if IP is already blocked, before generating or sending anything
+        if device["ip_address"] in blocked_ips:
+            return _BLOCKED_RESP
+        
+        data = await request.get_json()
         attack_type = data.get("attack_type", "dos").lower()
         
         # Generate test payload based on attack type
@@ -349,102 +491,40 @@ def trigger_payload(device_id):
         
         # 🚀 SEND REAL PAYLOAD TO THE DEVICE
         # This actually sends network traffic to the mobile/server instance
-        print(f"\n{'='*60}")
-        print(f"🎯 TRIGGERING REAL PAYLOAD TO DEVICE: {device['device_name']}")
-        print(f"📍 Target: {device['ip_address']}:{device.get('threat_detector_port', 5000)}")
-        print(f"⚔️  Attack Type: {attack_type.upper()}")
-        print(f"{'='*60}\n")
+        if app.debug:
+            print(f"\n{'='*60}")
+            print(f"🎯 TRIGGERING REAL PAYLOAD TO DEVICE: {device['device_name']}")
+            print(f"📍 Target: {device['ip_address']}:{device.get('threat_detector_port', 5000)}")
+            print(f"⚔️  Attack Type: {attack_type.upper()}")
+            print(f"{'='*60}\n")
         
         target_port = device.get("threat_detector_port", 5000)  # Port where threat detector is running
-        real_payload_result = trigger_real_payload(attack_type, device["ip_address"], target_port)
-        
-        # Log the real payload transmission
-        if real_payload_result.get("success"):
-            print(f"✅ Real payload sent successfully!")
-            print(f"📊 Details: {real_payload_result['details']}")
-        else:
-            print(f"⚠️  Warning: Real payload transmission had issues")
-            print(f"   This might be because the device is offline or unreachable")
-            print(f"   Continuing with simulated detection for demonstration...")
+        # Raw socket sends run in a worker thread; the response doesn't wait for them
+        send_task = asyncio.create_task(asyncio.to_thread(
+            trigger_real_payload, attack_type, device["ip_address"], target_port
+        ))
+        _payload_tasks.add(send_task)
+        send_task.add_done_callback(_report_real_payload)
         
         # Process the payload through the threat detection system
         # Simulate sending to the device (in production, this would actually send to the device)
         payload["src_ip"] = device["ip_address"]
         
-        # Check if IP is already blocked
-        if is_blocked(payload["src_ip"]):
-            return jsonify({
-                "status": "BLOCKED",
-                "message": "IP is blocked due to previous violations"
-            }), 403
-        
         # Detect threat using the same logic as /api/request
-        rate = payload.get("rate", 0)
-        sbytes = payload.get("sbytes", 0)
-        protocol = payload.get("protocol", "tcp").lower()
-        state = payload.get("state", "").upper()
-        ct_dst_ltm = payload.get("ct_dst_ltm", 0)
-        
-        is_attack = False
-        attack_name = "Normal"
-        attack_label = 0
-        confidence = 0.5
-        
-        # DoS Detection
-        if rate > 200 or (sbytes > 50000 and rate > 50):
-            is_attack = True
-            attack_name = "DoS"
-            attack_label = 1
-            confidence = min(0.95, 0.70 + (rate / 1000))
-            
-        # Exploit Detection
-        elif sbytes > 70000 or (protocol == "tcp" and sbytes > 50000):
-            is_attack = True
-            attack_name = "Exploits"
-            attack_label = 2
-            confidence = min(0.95, 0.75 + (sbytes / 100000))
-            
-        # Reconnaissance/Port Scan
-        elif ct_dst_ltm > 100 or (state == "REQ" and payload.get("dpkts", 0) == 0):
-            is_attack = True
-            attack_name = "Reconnaissance"
-            attack_label = 4
-            confidence = min(0.92, 0.80 + (ct_dst_ltm / 500))
-            
-        # Backdoor Detection
-        elif payload.get("dur", 0) > 100 and sbytes > 100000:
-            is_attack = True
-            attack_name = "Backdoor"
-            attack_label = 6
-            confidence = 0.88
-        
-        mitigation_result = None
+        is_attack, attack_name, attack_label, confidence = classify_payload(PayloadView.from_json(payload))
         
         if is_attack:
-            # Log threat
-            log_threat(payload, attack_name, -1.0)
-            
-            # Execute mitigation
-            mitigation_result = mitigate(payload["src_ip"], attack_label)
-            log_mitigation(payload["src_ip"], attack_name, mitigation_result["action"])
-            
-            # Update device metrics
-            device_metrics = device.get("metrics", {})
-            device_metrics["threats_detected"] = device_metrics.get("threats_detected", 0) + 1
-            device_metrics["mitigations_applied"] = device_metrics.get("mitigations_applied", 0) + 1
-            device_metrics["total_requests"] = device_metrics.get("total_requests", 0) + 1
-            update_device_status(device_id, device["status"], device_metrics)
+            mitigation_result = _handle_threat(payload, attack_name, attack_label, device)
             
             return jsonify({
                 "success": True,
                 "status": "THREAT",
                 "payload": payload,
                 "detection_result": {
+                    **DETECTION_BASE,
                     "attack_type": attack_name,
                     "attack_label": attack_label,
-                    "confidence": confidence,
-                    "anomaly_score": -1.0,
-                    "detection_method": "ai_heuristic"
+                    "confidence": confidence
                 },
                 "mitigation": mitigation_result,
                 "message": f"Payload triggered! Detected {attack_name} attack and applied mitigation: {mitigation_result['action']}"
@@ -454,101 +534,79 @@ def trigger_payload(device_id):
             log_activity(payload)
             
             # Update device metrics
-            device_metrics = device.get("metrics", {})
-            device_metrics["total_requests"] = device_metrics.get("total_requests", 0) + 1
-            update_device_status(device_id, device["status"], device_metrics)
+            METRIC_DELTAS[device_id]["total_requests"] += 1
             
             return jsonify({
                 "success": True,
                 "status": "NORMAL",
                 "payload": payload,
-                "detection_result": {
-                    "attack_type": "Normal",
-                    "confidence": 0.95
-                },
+                "detection_result": _NORMAL_DETECTION,
                 "message": "Payload triggered! Traffic appears normal, no mitigation needed."
             })
         
     except Exception as e:
-        print(f"❌ Error triggering payload: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("triggering payload failed")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/users/<device_id>/activity", methods=["GET"])
-def get_device_activity(device_id):
+async def get_device_activity(device_id):
     """Get recent activity logs for a specific device"""
     try:
         device = get_device(device_id)
         if not device:
-            return jsonify({
-                "success": False,
-                "error": "Device not found"
-            }), 404
+            return _NOT_FOUND_RESP
         
         lines = int(request.args.get("lines", 20))
-        logs = get_recent_logs("activity", lines)
-        
-        # Filter logs for this specific device IP
-        device_ip = device["ip_address"]
-        filtered_logs = [log for log in logs if device_ip in log]
+        logs = get_device_logs("activity", device["ip_address"], lines)
         
         return jsonify({
             "success": True,
             "device_id": device_id,
             "log_type": "activity",
-            "entries": [log.strip() for log in filtered_logs]
+            "entries": [log.strip() for log in logs]
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/users/<device_id>/threats", methods=["GET"])
-def get_device_threats(device_id):
+async def get_device_threats(device_id):
     """Get recent threat logs for a specific device"""
     try:
         device = get_device(device_id)
         if not device:
-            return jsonify({
-                "success": False,
-                "error": "Device not found"
-            }), 404
+            return _NOT_FOUND_RESP
         
         lines = int(request.args.get("lines", 20))
-        logs = get_recent_logs("threat", lines)
+        logs = get_device_logs("threat", device["ip_address"], lines)
         
-        # Filter logs for this specific device IP
-        device_ip = device["ip_address"]
-        filtered_logs = [log for log in logs if device_ip in log]
+        return jsonify({
+            "success": True,
+            "device_id": device_id,
+            "log_type": "threat",
+            "entries": [log.strip() for log in logs]
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/users/<device_id>/mitigations", methods=["GET"])
-def get_device_mitigations(device_id):
+async def get_device_mitigations(device_id):
     """Get recent mitigation logs for a specific device"""
     try:
         device = get_device(device_id)
         if not device:
-            return jsonify({
-                "success": False,
-                "error": "Device not found"
-            }), 404
+            return _NOT_FOUND_RESP
         
         lines = int(request.args.get("lines", 20))
-        logs = get_recent_logs("mitigation", lines)
-        
-        # Filter logs for this specific device IP
-        device_ip = device["ip_address"]
-        filtered_logs = [log for log in logs if device_ip in log]
+        logs = get_device_logs("mitigation", device["ip_address"], lines)
         
         return jsonify({
             "success": True,
             "device_id": device_id,
             "log_type": "mitigation",
-            "entries": [log.strip() for log in filtered_logs]
+            "entries": [log.strip() for log in logs]
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -565,75 +623,68 @@ def generate_test_payload(attack_type, target_ip):
     Returns:
         Dictionary with network traffic features
     """
-    import random
-    import time
+    (rate_lo, rate_hi, sbytes_lo, sbytes_hi, spkts_lo, spkts_hi,
+     dur_lo, dur_hi, ct_lo, ct_hi, state, dpkts) = TEMPLATES.get(attack_type, TEMPLATES["normal"])
     
-    base_payload = {
+    return {
         "dst_ip": target_ip,
         "timestamp": time.time(),
         "protocol": "tcp",
-        "state": "CON",
-        "dpkts": 10,
+        "state": state,
+        "dpkts": dpkts,
         "dttl": 254,
-        "sttl": 254
+        "sttl": 254,
+        "rate": int(_RNG.integers(rate_lo, rate_hi, endpoint=True)),
+        "sbytes": int(_RNG.integers(sbytes_lo, sbytes_hi, endpoint=True)),
+        "spkts": int(_RNG.integers(spkts_lo, spkts_hi, endpoint=True)),
+        "dur": float(_RNG.uniform(dur_lo, dur_hi)),
+        "ct_dst_ltm": int(_RNG.integers(ct_lo, ct_hi, endpoint=True))
     }
-    
-    if attack_type == "dos":
-        # DoS attack: High rate and large bytes
-        base_payload.update({
-            "rate": random.randint(250, 500),
-            "sbytes": random.randint(60000, 100000),
-            "spkts": random.randint(300, 600),
-            "dur": random.uniform(0.1, 2.0),
-            "ct_dst_ltm": random.randint(10, 50)
-        })
-    elif attack_type == "exploit":
-        # Exploit: Large packet sizes
-        base_payload.update({
-            "rate": random.randint(20, 100),
-            "sbytes": random.randint(75000, 150000),
-            "spkts": random.randint(50, 150),
-            "dur": random.uniform(1.0, 10.0),
-            "ct_dst_ltm": random.randint(5, 20)
-        })
-    elif attack_type == "reconnaissance":
-        # Port scan: High connection attempts
-        base_payload.update({
-            "rate": random.randint(50, 150),
-            "sbytes": random.randint(100, 1000),
-            "spkts": random.randint(20, 80),
-            "dur": random.uniform(0.01, 0.5),
-            "ct_dst_ltm": random.randint(150, 300),
-            "state": "REQ",
-            "dpkts": 0
-        })
-    elif attack_type == "backdoor":
-        # Backdoor: Long duration, large bidirectional traffic
-        base_payload.update({
-            "rate": random.randint(10, 50),
-            "sbytes": random.randint(120000, 200000),
-            "spkts": random.randint(100, 200),
-            "dur": random.uniform(150, 500),
-            "ct_dst_ltm": random.randint(1, 5)
-        })
-    else:  # normal
-        # Normal traffic
-        base_payload.update({
-            "rate": random.randint(1, 50),
-            "sbytes": random.randint(100, 10000),
-            "spkts": random.randint(5, 50),
-            "dur": random.uniform(0.1, 5.0),
-            "ct_dst_ltm": random.randint(1, 10)
-        })
-    
-    return base_payload
 
 
-
-@app.route("/static/<path:filename>")
-def serve_static_files(filename):
-    """Serve static CSS and JS files"""
-    return send_from_directory("static", filename)
+def generate_test_payloads(attack_type, target_ip, n):
+    """
+    Generate a batch of realistic test payloads for one attack type
+    
+    Args:
+        attack_type: Type of attack to simulate
+        target_ip: Target IP address
+        n: Number of payloads to generate
+        
+    Returns:
+        List of dictionaries with network traffic features
+    """
+    (rate_lo, rate_hi, sbytes_lo, sbytes_hi, spkts_lo, spkts_hi,
+     dur_lo, dur_hi, ct_lo, ct_hi, state, dpkts) = TEMPLATES.get(attack_type, TEMPLATES["normal"])
+    
+    timestamp = time.time()
+    
+    # One .tolist() per field converts the whole column to Python numbers
+    columns = zip(
+        _RNG.integers(rate_lo, rate_hi, n, endpoint=True).tolist(),
+        _RNG.integers(sbytes_lo, sbytes_hi, n, endpoint=True).tolist(),
+        _RNG.integers(spkts_lo, spkts_hi, n, endpoint=True).tolist(),
+        _RNG.uniform(dur_lo, dur_hi, n).tolist(),
+        _RNG.integers(ct_lo, ct_hi, n, endpoint=True).tolist()
+    )
+    
+    return [
+        {
+            "dst_ip": target_ip,
+            "timestamp": timestamp,
+            "protocol": "tcp",
+            "state": state,
+            "dpkts": dpkts,
+            "dttl": 254,
+            "sttl": 254,
+            "rate": rate,
+            "sbytes": sbytes,
+            "spkts": spkts,
+            "dur": dur,
+            "ct_dst_ltm": ct_dst_ltm
+        }
+        for rate, sbytes, spkts, dur, ct_dst_ltm in columns
+    ]
 
 
 if __name__ == "__main__":
@@ -644,4 +695,5 @@ if __name__ == "__main__":
     print(f"🌐 Access demo at http://localhost:5000 by Sypanse X")
     print("="*50 + "\n")
     
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Local development only; production runs under gunicorn (see Procfile)
+    app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,115 @@
+"""
+Threat Detection for Cloud Threat Detection System
+Single entry point for classifying request payloads with the heuristic rules
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+from utils.classifier import classify, protocol_code, state_code
+
+# Attack label -> attack name (UNSW-NB15 categories); the heuristic
+# detector only emits Normal, DoS, Exploits, Reconnaissance and Backdoor
+ATTACK_NAMES = {
+    0: "Normal",
+    1: "DoS",
+    2: "Exploits",
+    3: "Fuzzers",
+    4: "Reconnaissance",
+    5: "Analysis",
+    6: "Backdoor",
+    7: "Shellcode",
+    8: "Worms",
+    9: "Generic"
+}
+
+# Precomputed (is_attack, attack_name, attack_label) for each label
+ATTACK_RESULTS = {label: (label != 0, name, label) for label, name in ATTACK_NAMES.items()}
+
+# Fields shared by every heuristic detection result
+DETECTION_BASE = {
+    "anomaly_score": -1.0,
+    "detection_method": "ai_heuristic"
+}
+
+
+def _number(payload, key):
+    """Read a numeric payload field; missing, null or non-numeric values read as 0"""
+    value = payload.get(key, 0)
+    try:
+        return float(value)
+    except OverflowError:
+        # Integers beyond float range still compare as larger than any threshold
+        return math.inf if value > 0 else -math.inf
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class PayloadView:
+    """Classifier inputs parsed once from a request payload"""
+
+    __slots__ = ("rate", "sbytes", "protocol", "state", "ct_dst_ltm", "dpkts", "dur", "src_ip")
+
+    rate: float
+    sbytes: float
+    protocol: int
+    state: int
+    ct_dst_ltm: float
+    dpkts: float
+    dur: float
+    src_ip: str
+
+    @classmethod
+    def from_json(cls, payload):
+        """
+        Parse a request payload
+
+        Args:
+            payload (dict): Request payload
+
+        Returns:
+            PayloadView: Parsed classifier inputs
+        """
+        return cls(
+            _number(payload, "rate"),
+            _number(payload, "sbytes"),
+            protocol_code(payload.get("protocol", "tcp")),
+            state_code(payload.get("state", "")),
+            _number(payload, "ct_dst_ltm"),
+            _number(payload, "dpkts"),
+            _number(payload, "dur"),
+            payload.get("src_ip", "Unknown")
+        )
+
+    def features(self):
+        """Classifier arguments in classify() order"""
+        return (self.rate, self.sbytes, self.protocol, self.state,
+                self.ct_dst_ltm, self.dpkts, self.dur)
+
+
+@lru_cache(maxsize=4096)
+def _classify_cached(features):
+    """Classify a parsed feature tuple; repeated flows are served from the cache"""
+    attack_label, confidence = classify(*features)
+    return ATTACK_RESULTS[attack_label] + (confidence,)
+
+
+def classify_payload(view: PayloadView) -> Tuple[bool, str, int, float]:
+    """
+    Classify a single request payload
+
+    Args:
+        view (PayloadView): Parsed request payload
+
+    Returns:
+        tuple: (is_attack, attack_name, attack_label, confidence)
+    """
+    return _classify_cached(view.features())
+
+
+def cache_stats():
+    """Get hit/miss statistics for the classification cache"""
+    return _classify_cached.cache_info()._asdict()
@@ -1,11 +1,93 @@
+"""
+Mitigation Actions for Cloud Threat Detection System
+Applies automated responses based on the detected attack type
+"""
+
+import logging
+from datetime import datetime
+
+from detection import ATTACK_NAMES
+
+log = logging.getLogger("detector.actions")
+
+# In-memory mitigation state
+blocked_ips = set()
+rate_limited_ips = {}
+session_blacklist = set()
+
+# Rate-limit violations allowed before an IP is blocked outright
+MAX_RATE_VIOLATIONS = 3
+
+
+def mitigate(ip, attack_label):
+    """
+    Apply mitigation for a detected attack
+
+    Args:
+        ip (str): Source IP address of the threat
+        attack_label (int): Attack class predicted by the detector
+
+    Returns:
+        dict: Mitigation result with the action taken
+    """
+    attack_type = ATTACK_NAMES.get(attack_label, "Unknown")
+
+    if attack_label == 1:
+        return _mitigate_dos(ip)
+    elif attack_label in (2, 6, 7, 8):
+        return _block_ip(ip, attack_type)
+    elif attack_label == 4:
+        return _monitor_ip(ip, attack_type)
+    elif attack_label in (3, 5, 9):
+        return _terminate_session(ip, attack_type)
+    else:
+        return _default_mitigation(ip, attack_type)
+
+
+def _block_ip(ip, attack_type):
+    """Block IP for critical threats"""
+    blocked_ips.add(ip)
+    log.debug("🔒 Blocked %s - %s", ip, attack_type)
+    return {"action": "Blocked", "reason": attack_type}
+
+
 def _mitigate_dos(ip):
     """Handle DoS attacks with rate limiting"""
     if ip in rate_limited_ips:
         rate_limited_ips[ip]["violations"] += 1
     else:
         rate_limited_ips[ip] = {
-"""Default mitigation for unknown attack types"""
-    print(f"⚠️  Alert triggered for {ip} - {attack_type}")
+            "violations": 1,
+            "since": datetime.now().isoformat()
+        }
+
+    if rate_limited_ips[ip]["violations"] >= MAX_RATE_VIOLATIONS:
+        return _block_ip(ip, "DoS")
+
+    log.debug("⏱️  Rate limited %s (violation %d)", ip, rate_limited_ips[ip]["violations"])
+    return {
+        "action": "rate_limited",
+        "reason": "DoS",
+        "violations": rate_limited_ips[ip]["violations"]
+    }
+
+
+def _terminate_session(ip, attack_type):
+    """Terminate active sessions for suspicious activity"""
+    session_blacklist.add(ip)
+    log.debug("✂️  Session terminated for %s - %s", ip, attack_type)
+    return {"action": "session_terminated", "reason": attack_type}
+
+
+def _monitor_ip(ip, attack_type):
+    """Enhanced monitoring for reconnaissance"""
+    log.debug("👁️  Monitoring %s - %s", ip, attack_type)
+    return {"action": "monitored", "reason": attack_type}
+
+
+def _default_mitigation(ip, attack_type):
+    """Default mitigation for unknown attack types"""
+    log.debug("⚠️  Alert triggered for %s - %s", ip, attack_type)
     return {"action": "alert", "reason": attack_type}
 
 
@@ -13,9 +95,20 @@ def is_blocked(ip):
     """Check if IP is blocked"""
     return ip in blocked_ips
 
+
+def get_mitigation_stats():
+    """Get current mitigation statistics"""
+    return {
+        "blocked_ips": len(blocked_ips),
+        "rate_limited_ips": len(rate_limited_ips),
+        "blacklisted_sessions": len(session_blacklist),
+        "blocked_list": sorted(blocked_ips)
+    }
+
+
 def reset_mitigations():
     """Reset all mitigation states (for testing)"""
     blocked_ips.clear()
     rate_limited_ips.clear()
     session_blacklist.clear()
-    print("🔄 Mitigation states reset")
+    log.info("🔄 Mitigation states reset")
@@ -0,0 +1,72 @@
+"""
+Heuristic Classifier for Cloud Threat Detection System
+DoS/Exploit/Recon/Backdoor rules compiled to native code with Numba
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is unavailable on some platforms (e.g. Termux); run the rules interpreted
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# Protocol/state strings are mapped to small integer codes once at parse time
+PROTOCOL_CODES = {"tcp": 0, "udp": 1, "icmp": 2}
+STATE_CODES = {"FIN": 0, "INT": 1, "CON": 2, "REQ": 3, "RST": 4}
+UNKNOWN_CODE = -1
+
+PROTO_TCP = PROTOCOL_CODES["tcp"]
+STATE_REQ = STATE_CODES["REQ"]
+
+
+def protocol_code(protocol):
+    """Map a protocol name to its integer code"""
+    return PROTOCOL_CODES.get(protocol.lower(), UNKNOWN_CODE)
+
+
+def state_code(state):
+    """Map a connection state to its integer code"""
+    return STATE_CODES.get(state.upper(), UNKNOWN_CODE)
+
+
+CLASSIFY_SIGNATURE = "Tuple((int64,float64))(float64,float64,int64,int64,float64,float64,float64)"
+
+
+def _classify_rules(rate, sbytes, protocol_id, state_id, ct_dst_ltm, dpkts, dur):
+    """
+    Classify one flow with the heuristic rules
+
+    The cascade is a shallow decision tree over the exact rule thresholds.
+    Numba lowers it to native compares, so it is kept as written rather than
+    refit as a learned tree.
+
+    Returns:
+        tuple: (attack_label, confidence); label 0 means normal traffic
+    """
+    # DoS Detection
+    if rate > 200 or (sbytes > 50000 and rate > 50):
+        return 1, min(0.95, 0.70 + (rate / 1000))
+
+    # Exploit Detection
+    if sbytes > 70000 or (protocol_id == PROTO_TCP and sbytes > 50000):
+        return 2, min(0.95, 0.75 + (sbytes / 100000))
+
+    # Reconnaissance/Port Scan
+    if ct_dst_ltm > 100 or (state_id == STATE_REQ and dpkts == 0):
+        return 4, min(0.92, 0.80 + (ct_dst_ltm / 500))
+
+    # Backdoor Detection (long duration, bi-directional traffic)
+    if dur > 100 and sbytes > 100000:
+        return 6, 0.88
+
+    return 0, 0.5
+
+
+try:
+    classify = njit(CLASSIFY_SIGNATURE, cache=True)(_classify_rules)
+except RuntimeError:
+    # No writable cache location (e.g. a read-only serverless filesystem); compile in memory
+    classify = njit(CLASSIFY_SIGNATURE)(_classify_rules)
+
+# Pay the JIT cold-start once at import instead of on the first request
+classify(0.0, 0.0, 0, 0, 0.0, 0.0, 0.0)
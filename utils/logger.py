@@ -3,8 +3,15 @@ Logger for Cloud Threat Detection System
 Handles logging to .txt files for activity, threats, and mitigation
 """
 
+import atexit
+import logging
 import os
+import queue
+import re
+from collections import OrderedDict, deque
 from datetime import datetime
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
 
 LOG_DIR = "logs"
 
@@ -15,6 +22,155 @@ ACTIVITY_LOG = os.path.join(LOG_DIR, "activity_log.txt")
 THREAT_LOG = os.path.join(LOG_DIR, "threat_log.txt")
 MITIGATION_LOG = os.path.join(LOG_DIR, "mitigation_log.txt")
 
+LOG_FILES = {
+    "activity": ACTIVITY_LOG,
+    "threat": THREAT_LOG,
+    "mitigation": MITIGATION_LOG
+}
+
+# Buffered log lines are flushed to disk after this many records
+FLUSH_EVERY = 100
+
+# In-memory tail of each log, overall and per source IP
+RECENT_MAX = 1000
+RECENT_PER_IP_MAX = 200
+
+# src_ip comes from the request body, so only the most recently logged IPs keep a tail
+MAX_TRACKED_IPS = 1024
+
+RECENT_BY_KIND = {kind: deque(maxlen=RECENT_MAX) for kind in LOG_FILES}
+BY_IP = {kind: OrderedDict() for kind in LOG_FILES}
+
+_IP_PATTERN = re.compile(r"IP:\s*(\S+)")
+
+# Console output for the "detector" logger tree (app errors, payload sends).
+# Per-request echoes are DEBUG, so they only show with LOG_LEVEL=DEBUG
+_console = logging.getLogger("detector")
+_console.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+_console.propagate = False
+
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_console.addHandler(_console_handler)
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that does not flush after every record
+    Flushes every FLUSH_EVERY records, or when the listener runs out of work
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename, mode="a", delay=True)
+        self.setFormatter(logging.Formatter("%(message)s"))
+        self._pending = 0
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            self._pending += 1
+            if self._pending >= FLUSH_EVERY:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+
+
+class _LogListener(QueueListener):
+    """QueueListener that flushes its handlers whenever the queue is drained"""
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+def _file_handler(name, log_file):
+    """Create a buffered file handler that only accepts records from one logger"""
+    handler = _BufferedFileHandler(log_file)
+    handler.addFilter(logging.Filter(name))
+    return handler
+
+
+def _queue_logger(name):
+    """Create a logger whose records are handed to the background writer"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(QueueHandler(_log_queue))
+    return logger
+
+
+# Request handlers only enqueue log records; file I/O happens on the listener thread
+_log_queue = queue.Queue()
+
+_activity_logger = _queue_logger("detector.activity")
+_threat_logger = _queue_logger("detector.threat")
+_mitigation_logger = _queue_logger("detector.mitigation")
+
+_file_handlers = [
+    _file_handler("detector.activity", ACTIVITY_LOG),
+    _file_handler("detector.threat", THREAT_LOG),
+    _file_handler("detector.mitigation", MITIGATION_LOG)
+]
+
+_listener = _LogListener(_log_queue, *_file_handlers)
+_listener.start()
+atexit.register(_listener.stop)
+
+# Threads don't survive fork (e.g. gunicorn --preload); restart the writer in each worker
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_listener.start)
+
+_loggers = {
+    "activity": _activity_logger,
+    "threat": _threat_logger,
+    "mitigation": _mitigation_logger
+}
+
+
+def _remember(kind, ip, entry):
+    """Add an entry to the in-memory tails"""
+    RECENT_BY_KIND[kind].append(entry)
+    
+    by_ip = BY_IP[kind]
+    tail = by_ip.get(ip)
+    if tail is None:
+        tail = by_ip[ip] = deque(maxlen=RECENT_PER_IP_MAX)
+        if len(by_ip) > MAX_TRACKED_IPS:
+            # Drop the least recently logged IP
+            by_ip.popitem(last=False)
+    else:
+        by_ip.move_to_end(ip)
+    tail.append(entry)
+
+
+def _publish(kind, ip, entry):
+    """Record a log entry in memory and queue it for the log file"""
+    _remember(kind, ip, entry)
+    _loggers[kind].info(entry)
+
+
+def _load_recent():
+    """Seed the in-memory tails from existing log files"""
+    for kind, log_file in LOG_FILES.items():
+        if not os.path.exists(log_file):
+            continue
+        with open(log_file, "r") as f:
+            for line in deque(f, maxlen=RECENT_MAX):
+                entry = line.rstrip("\n")
+                match = _IP_PATTERN.search(entry)
+                _remember(kind, match.group(1) if match else "Unknown", entry)
+
+
+_load_recent()
+
 
 def _get_timestamp():
     """Get formatted timestamp for logs"""
@@ -35,10 +191,9 @@ def log_activity(payload):
     
     log_entry = f"{timestamp} IP:{ip} | Requests: {requests} | Status: {status}\n"
     
-    with open(ACTIVITY_LOG, "a") as f:
-        f.write(log_entry)
+    _publish("activity", ip, log_entry.rstrip("\n"))
     
-    print(f"✅ {log_entry.strip()}")
+    _console.debug("✅ %s", log_entry.strip())
 
 
 def log_threat(payload, attack_type, anomaly_score=None):
@@ -56,10 +211,9 @@ def log_threat(payload, attack_type, anomaly_score=None):
     
     log_entry = f"{timestamp} Anomaly Detected | IP:{ip} | Attack: {attack_type}{score_info}\n"
     
-    with open(THREAT_LOG, "a") as f:
-        f.write(log_entry)
+    _publish("threat", ip, log_entry.rstrip("\n"))
     
-    print(f"🚨 {log_entry.strip()}")
+    _console.debug("🚨 %s", log_entry.strip())
 
 
 def log_mitigation(ip, attack_type, action="Blocked"):
@@ -75,10 +229,9 @@ def log_mitigation(ip, attack_type, action="Blocked"):
     
     log_entry = f"{timestamp} {attack_type} Attack | IP: {ip} | Action: {action}\n"
     
-    with open(MITIGATION_LOG, "a") as f:
-        f.write(log_entry)
+    _publish("mitigation", ip, log_entry.rstrip("\n"))
     
-    print(f"🔒 {log_entry.strip()}")
+    _console.debug("🔒 %s", log_entry.strip())
 
 
 def get_recent_logs(log_type="activity", lines=10):
@@ -92,25 +245,47 @@ def get_recent_logs(log_type="activity", lines=10):
     Returns:
         list: Recent log entries
     """
-    log_files = {
-        "activity": ACTIVITY_LOG,
-        "threat": THREAT_LOG,
-        "mitigation": MITIGATION_LOG
-    }
-    
-    log_file = log_files.get(log_type, ACTIVITY_LOG)
+    recent = RECENT_BY_KIND.get(log_type, RECENT_BY_KIND["activity"])
+    return list(islice(recent, max(len(recent) - lines, 0), None))
+
+
+def get_device_logs(log_type, ip, lines=10):
+    """
+    Get recent log entries for a single IP address
     
-    if not os.path.exists(log_file):
+    Args:
+        log_type (str): Type of log (activity/threat/mitigation)
+        ip (str): Source IP address
+        lines (int): Number of recent lines to return
+        
+    Returns:
+        list: Recent log entries for the IP
+    """
+    by_ip = BY_IP.get(log_type, BY_IP["activity"])
+    if ip not in by_ip:
         return []
     
-    with open(log_file, "r") as f:
-        all_lines = f.readlines()
-        return all_lines[-lines:] if len(all_lines) > lines else all_lines
+    recent = by_ip[ip]
+    return list(islice(recent, max(len(recent) - lines, 0), None))
 
 
 def clear_logs():
     """Clear all log files (use for testing)"""
+    # Close open files first; handlers reopen them on the next record
+    for handler in _file_handlers:
+        handler.acquire()
+        try:
+            if handler.stream is not None:
+                handler.stream.close()
+                handler.stream = None
+        finally:
+            handler.release()
+    
     for log_file in [ACTIVITY_LOG, THREAT_LOG, MITIGATION_LOG]:
         if os.path.exists(log_file):
             os.remove(log_file)
-    print("🗑️ All logs cleared")
+    
+    for kind in LOG_FILES:
+        RECENT_BY_KIND[kind].clear()
+        BY_IP[kind].clear()
+    _console.info("🗑️ All logs cleared")
@@ -4,15 +4,22 @@ Handles registration and monitoring of Termux devices
 """
 
 import json
+import logging
 import os
 import uuid
 import base64
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict, List, Optional
 
 # Path to users data file
 USERS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "users.json")
 
+log = logging.getLogger("detector.users")
+
+# Pending metric increments per device, written to USERS_FILE in batches
+METRIC_DELTAS: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
 def _ensure_data_file():
     """Ensure data directory and file exist"""
     os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
@@ -90,6 +97,14 @@ def add_device(device_name: str, ip_address: str, username: str, password: str,
     
     return device
 
+def public_dict(device: Dict) -> Dict:
+    """Copy of a device without its stored password, safe to send to clients"""
+    return {k: v for k, v in device.items() if k != "password"}
+
+def get_public_devices() -> List[Dict]:
+    """Get list of all registered devices without passwords"""
+    return [public_dict(device) for device in _load_devices()]
+
 def get_all_devices() -> List[Dict]:
     """Get list of all registered devices"""
     devices = _load_devices()
@@ -180,6 +195,56 @@ def update_device_status(device_id: str, status: str, metrics: Optional[Dict] =
     
     update_device(device_id, updates)
 
+def take_metric_deltas() -> Dict[str, Dict[str, int]]:
+    """
+    Remove and return all pending metric increments
+    
+    Returns:
+        Dictionary of device ID -> {metric name: increment}
+    """
+    deltas = {device_id: dict(counters) for device_id, counters in METRIC_DELTAS.items()}
+    METRIC_DELTAS.clear()
+    return deltas
+
+def apply_metric_deltas(deltas: Dict[str, Dict[str, int]]):
+    """
+    Add aggregated metric increments to the stored devices in one write
+    
+    Args:
+        deltas: Dictionary of device ID -> {metric name: increment}
+    """
+    if not deltas:
+        return
+    
+    devices = _load_devices()
+    now = datetime.now().isoformat()
+    updated = False
+    
+    for device in devices:
+        counters = deltas.get(device["device_id"])
+        if not counters:
+            continue
+        
+        metrics = device.setdefault("metrics", {})
+        if not isinstance(metrics, dict):
+            log.warning("skipping metrics for device %s: stored metrics are not an object",
+                        device["device_id"])
+            continue
+        
+        for name, increment in counters.items():
+            try:
+                metrics[name] = metrics.get(name, 0) + increment
+            except TypeError:
+                # A client stored a non-numeric value through the status endpoint
+                log.warning("skipping metric %r for device %s: stored value %r is not a number",
+                            name, device["device_id"], metrics[name])
+        device["last_seen"] = now
+        updated = True
+    
+    # Deltas for devices deleted since they were buffered need no write
+    if updated:
+        _save_devices(devices)
+
 def get_device_credentials(device_id: str) -> Optional[Dict]:
     """
     Get device credentials (decoded)